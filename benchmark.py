@@ -0,0 +1,53 @@
+# Benchmark: ciclo de descodificação genérico (GZIP.decodeSymbols) vs descodificadores gerados para cada tabela (codegen)
+# Teoria da Informacao, LEI, 2022
+
+import os
+import sys
+import time
+import gzip
+import random
+import tempfile
+from gzip_1 import GZIP
+
+#Função responsável por criar um ficheiro gzip de teste com texto pseudo-aleatório (Blocos de Huffman dinâmico), caso não seja indicado nenhum ficheiro.
+def makeSample(size):
+	random.seed(2022)
+	words = [''.join(random.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(random.randint(2, 10))) for _ in range(2000)]
+
+	text = ''
+	while len(text) < size:
+		text += ' '.join(random.choice(words) for _ in range(1000)) + '\n'
+
+	fd, fileName = tempfile.mkstemp(suffix='.gz')
+	os.write(fd, gzip.compress(text[:size].encode(), 9))
+	os.close(fd)
+
+	return fileName
+
+#Função responsável por descomprimir o ficheiro inteiro e retornar o tempo e o tamanho do resultado.
+def run(fileName, codegen):
+	gz = GZIP(fileName)
+	gz.getHeader()
+
+	t = time.perf_counter()
+	size = sum(len(chunk) for chunk in gz.inflate(codegen=codegen))
+	t = time.perf_counter() - t
+
+	gz.f.close()
+	return t, size
+
+if __name__ == '__main__':
+
+	fileName = sys.argv[1] if len(sys.argv) > 1 else makeSample(2 * 1024 * 1024)
+	repeat = 3
+
+	tGeneric = min(run(fileName, False)[0] for _ in range(repeat))
+	tCodegen, size = min(run(fileName, True) for _ in range(repeat))
+
+	print('%s: %d bytes' % (fileName, size))
+	print('generic : %.3f s (%.2f MB/s)' % (tGeneric, size / tGeneric / 1e6))
+	print('codegen : %.3f s (%.2f MB/s)' % (tCodegen, size / tCodegen / 1e6))
+	print('speedup : %.2fx' % (tGeneric / tCodegen))
+
+	if len(sys.argv) == 1:
+		os.remove(fileName)
@@ -2,9 +2,357 @@
 # Adapted from Java's implementation of Rui Pedro Paiva
 # Teoria da Informacao, LEI, 2022
 
+import os
 import sys
+import zlib
+import struct
+import bisect
+import fnmatch
+import tarfile
+import argparse
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from huffmantree import HuffmanTree
 
+#O NumPy é opcional: sem ele, a expansão dos tokens é feita em Python puro.
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+#Número de bytes lidos do ficheiro comprimido de cada vez.
+READ_SIZE = 1 << 20
+
+#Tamanho da janela deslizante do LZ77 (32 KiB). As distâncias do deflate nunca ultrapassam este valor.
+WINDOW_SIZE = 32768
+
+#Comprimentos base e número de bits extra para os símbolos 257 - 285 do alfabeto de literais/comprimentos.
+LENGTH_BASE = [3, 4, 5, 6, 7, 8, 9, 10, 11, 13, 15, 17, 19, 23, 27, 31, 35, 43, 51, 59, 67, 83, 99, 115, 131, 163, 195, 227, 258]
+LENGTH_EXTRA = [0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 2, 2, 2, 2, 3, 3, 3, 3, 4, 4, 4, 4, 5, 5, 5, 5, 0]
+
+#Distâncias base e número de bits extra para os símbolos 0 - 29 do alfabeto de distâncias.
+DIST_BASE = [1, 2, 3, 4, 5, 7, 9, 13, 17, 25, 33, 49, 65, 97, 129, 193, 257, 385, 513, 769, 1025, 1537, 2049, 3073, 4097, 6145, 8193, 12289, 16385, 24577]
+DIST_EXTRA = [0, 0, 0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6, 7, 7, 8, 8, 9, 9, 10, 10, 11, 11, 12, 12, 13, 13]
+
+#Exceção lançada quando os dados comprimidos são inválidos (Cabeçalho, tipo de bloco ou trailer).
+class GZIPError(Exception):
+	pass
+
+#Classe responsável por guardar os tokens LZ77 de um bloco, descodificados mas ainda não expandidos.
+class DeflateTokens:
+	#O campo literals contém os literais do bloco, pela ordem em que surgem.
+	#O campo litRuns contém, para cada par comprimento/distância, o número de literais que o antecedem. O último valor corresponde aos literais depois do último par.
+	#Os campos lengths e distances contêm o comprimento e a distância de cada par.
+	literals = litRuns = lengths = distances = None
+
+	def __init__(self):
+		self.literals = array('B')
+		self.litRuns = array('I')
+		self.lengths = array('H')
+		self.distances = array('H')
+
+	#Método responsável por retornar o número de bytes que o bloco produz depois de expandido.
+	def size(self):
+		return len(self.literals) + sum(self.lengths)
+
+#Função responsável pela expansão dos tokens de um bloco (Segunda fase), com base no histórico (history) dos últimos 32 KiB já descomprimidos. Retorna os bytes produzidos pelo bloco.
+#Com NumPy os literais são todos colocados de uma só vez nas suas posições finais e as cópias sem sobreposição são feitas em grupos, cada um com um único gather. As cópias com sobreposição repetem o padrão, duplicando-o a cada iteração.
+def expandTokens(tokens, history=b''):
+	h = len(history)
+
+	if np is None:
+		out = bytearray(history)
+		literals = tokens.literals
+		lp = 0
+
+		for i in range(len(tokens.lengths)):
+			run = tokens.litRuns[i]
+			out += literals[lp : lp + run]
+			lp += run
+
+			length = tokens.lengths[i]
+			dist = tokens.distances[i]
+			start = len(out) - dist
+			if (dist >= length):
+				out += out[start : start + length]
+			else:
+				out += (out[start:] * (length // dist + 1))[:length]
+
+		out += literals[lp:]
+		return bytes(out[h:])
+
+	literals = np.frombuffer(tokens.literals, dtype=np.uint8)
+	runs = np.frombuffer(tokens.litRuns, dtype='u%d' % tokens.litRuns.itemsize).astype(np.int64)
+	lengths = np.frombuffer(tokens.lengths, dtype='u%d' % tokens.lengths.itemsize).astype(np.int64)
+
+	out = np.empty(h + len(literals) + int(lengths.sum()), dtype=np.uint8)
+	out[:h] = np.frombuffer(history, dtype=np.uint8)
+
+	#Posições de início de cada sequência de literais e de cada cópia.
+	seqSizes = runs.copy()
+	seqSizes[:-1] += lengths
+	litStarts = h + np.concatenate(([0], np.cumsum(seqSizes)[:-1]))
+	matchStarts = litStarts[:-1] + runs[:-1]
+
+	#Todos os literais são colocados de uma só vez.
+	litOffsets = np.concatenate(([0], np.cumsum(runs)[:-1]))
+	out[np.repeat(litStarts - litOffsets, runs) + np.arange(len(literals))] = literals
+
+	#As cópias são agrupadas: um grupo de cópias consecutivas cujas origens já estão escritas é feito com um único gather.
+	#A origem de uma cópia já está escrita se terminar antes do início do grupo, ou se estiver toda dentro da sequência de literais que antecede a cópia (Caso de groupEnds = -1).
+	#O fim de cada grupo é procurado com o NumPy, em janelas de tamanho crescente.
+	#As posições de destino e de origem de todos os bytes copiados são calculadas de uma só vez. Cada grupo corresponde a um slice destes dois arrays.
+	#Numa cópia com sobreposição (dist < length) o byte k é igual ao byte k % dist do padrão, pelo que a origem é sempre anterior ao início da cópia e não precisa de ser feita à parte.
+	dists = np.frombuffer(tokens.distances, dtype='u%d' % tokens.distances.itemsize).astype(np.int64)
+	srcEnds = matchStarts - dists + np.minimum(lengths, dists)
+	groupEnds = np.where(matchStarts - dists >= litStarts[:-1], -1, srcEnds)
+	lengthSums = np.concatenate(([0], np.cumsum(lengths)))
+	offsets = np.arange(lengthSums[-1]) - np.repeat(lengthSums[:-1], lengths)
+	copyDst = np.repeat(matchStarts, lengths) + offsets
+	copySrc = np.repeat(matchStarts - dists, lengths) + offsets % np.repeat(dists, lengths)
+
+	startList = matchStarts.tolist()
+	srcEndList = srcEnds.tolist()
+	lengthSumList = lengthSums.tolist()
+	count = len(startList)
+
+	i = 0
+	window = 16
+	while (i < count):
+		p = startList[i]
+
+		j = count
+		while (i + 1 < count):
+			hits = groupEnds[i + 1 : i + 1 + window] > p
+			first = int(hits.argmax())
+			if (hits[first]):
+				j = i + 1 + first
+				break
+			if (i + 1 + window >= count):
+				break
+			window *= 4
+
+		if (j == i + 1 and tokens.distances[i] >= tokens.lengths[i]):
+			length = tokens.lengths[i]
+			out[p : p + length] = out[srcEndList[i] - length : srcEndList[i]]
+		else:
+			a = lengthSumList[i]
+			b = lengthSumList[j]
+			out[copyDst[a:b]] = out[copySrc[a:b]]
+
+		window = max(16, 2 * (j - i))
+		i = j
+
+	return out[h:].tobytes()
+
+#Comprimentos dos códigos de Huffman fixos (BTYPE = 1) dos alfabetos de literais/comprimentos e de distâncias.
+FIXED_LIT_LENGTHS = [8] * 144 + [9] * 112 + [7] * 24 + [8] * 8
+FIXED_DIST_LENGTHS = [5] * 30
+
+#Tamanho máximo dos dados de cada membro BGZF (Tal como no htslib, garante que o membro comprimido cabe em 64 KiB).
+BGZF_BLOCK_SIZE = 0xff00
+
+#Membro BGZF vazio que marca o fim de um ficheiro BGZF.
+BGZF_EOF = bytes.fromhex('1f8b08040000000000ff0600424302001b0003000000000000000000')
+
+#Cache LRU dos descodificadores gerados, indexada pelos comprimentos dos códigos dos dois alfabetos. Guarda no máximo DECODER_CACHE_SIZE descodificadores (O dos códigos fixos fica à parte, em FIXED_DECODER).
+DECODER_CACHE = OrderedDict()
+DECODER_CACHE_SIZE = 64
+
+#Função responsável por construir a tabela de descodificação de um alfabeto a partir dos comprimentos dos seus códigos (Códigos canónicos, tal como em codeLengthsHuffman).
+#A tabela é indexada pelos próximos maxLen bits do buffer (Os códigos são lidos a partir do bit menos significativo, pelo que são invertidos) e cada entrada contém symbol << 4 | comprimento. As entradas sem código ficam a -1.
+#Retorna a tabela e o comprimento máximo dos códigos.
+def buildDecodeTable(codeLengths):
+	maxLen = max(codeLengths) if codeLengths else 0
+
+	blCount = [0] * (maxLen + 1)
+	for length in codeLengths:
+		blCount[length] += 1
+	blCount[0] = 0
+
+	nextCode = [0] * (maxLen + 1)
+	code = 0
+	for i in range(1, maxLen + 1):
+		code = (code + blCount[i - 1]) << 1
+		nextCode[i] = code
+
+	table = [-1] * (1 << maxLen)
+	for symbol in range(len(codeLengths)):
+		length = codeLengths[symbol]
+		if length == 0:
+			continue
+
+		code = nextCode[length]
+		nextCode[length] += 1
+
+		reverse = int(format(code, '0%db' % length)[::-1], 2)
+		for i in range(reverse, 1 << maxLen, 1 << length):
+			table[i] = (symbol << 4) | length
+
+	return tuple(table), maxLen
+
+#Função responsável por gerar o código que garante pelo menos need bits no buffer. Como need é conhecido, o ciclo é desenrolado em ifs encadeados (Um por byte).
+def generateRefill(need, indent):
+	lines = []
+	for i in range((need + 7) // 8):
+		tabs = '\t' * (indent + i)
+		lines.append(tabs + 'if avail < %d:' % need)
+		lines.append(tabs + '\tif pos >= size:')
+		lines.append(tabs + '\t\tgz.inPos = pos')
+		lines.append(tabs + '\t\tgz.fillBuffer()')
+		lines.append(tabs + '\t\tdata = gz.inBuffer')
+		lines.append(tabs + '\t\tpos = 0')
+		lines.append(tabs + '\t\tsize = len(data)')
+		lines.append(tabs + '\tbuf |= data[pos] << avail')
+		lines.append(tabs + '\tpos += 1')
+		lines.append(tabs + '\tavail += 8')
+	return lines
+
+#Função responsável por gerar, compilar (compile/exec) e retornar um descodificador especializado para um par de alfabetos.
+#O comprimento máximo e as máscaras de cada alfabeto ficam como constantes no código, as tabelas e o estado do leitor de bits ficam em variáveis locais e um segundo literal é descodificado sem voltar a encher o buffer sempre que este ainda tem bits suficientes.
+#O descodificador tem a mesma interface que GZIP.decodeSymbols: decodeBlock(gz, window, limit) retorna True no fim do bloco e False quando a janela atinge o tamanho limit.
+def generateDecoder(litLengths, distLengths):
+	litTable, litMax = buildDecodeTable(litLengths)
+	distTable, distMax = buildDecodeTable(distLengths)
+
+	lines = [
+		'def decodeBlock(gz, window, limit, LIT=LIT, DIST=DIST, LENGTH_BASE=LENGTH_BASE, LENGTH_EXTRA=LENGTH_EXTRA, DIST_BASE=DIST_BASE, DIST_EXTRA=DIST_EXTRA):',
+		'\tbuf = gz.bits_buffer',
+		'\tavail = gz.available_bits',
+		'\tdata = gz.inBuffer',
+		'\tpos = gz.inPos',
+		'\tsize = len(data)',
+		'\tappend = window.append',
+		'\twhile len(window) < limit:',
+	]
+	lines += generateRefill(litMax, 2)
+	lines += [
+		'\t\te = LIT[buf & %d]' % ((1 << litMax) - 1),
+		'\t\tn = e & 15',
+		'\t\tbuf >>= n',
+		'\t\tavail -= n',
+		'\t\tsymbol = e >> 4',
+		'\t\tif symbol < 256:',
+		'\t\t\tappend(symbol)',
+		'\t\t\tif avail >= %d:' % litMax,
+		'\t\t\t\te = LIT[buf & %d]' % ((1 << litMax) - 1),
+		'\t\t\t\tsymbol = e >> 4',
+		'\t\t\t\tif symbol < 256:',
+		'\t\t\t\t\tn = e & 15',
+		'\t\t\t\t\tbuf >>= n',
+		'\t\t\t\t\tavail -= n',
+		'\t\t\t\t\tappend(symbol)',
+		'\t\t\tcontinue',
+		'\t\tif symbol == 256:',
+		'\t\t\tgz.bits_buffer = buf',
+		'\t\t\tgz.available_bits = avail',
+		'\t\t\tgz.inPos = pos',
+		'\t\t\treturn True',
+	]
+	lines += generateRefill(5 + distMax, 2)
+	lines += [
+		'\t\tn = LENGTH_EXTRA[symbol - 257]',
+		'\t\tlength = LENGTH_BASE[symbol - 257] + (buf & ((1 << n) - 1))',
+		'\t\tbuf >>= n',
+		'\t\tavail -= n',
+		'\t\te = DIST[buf & %d]' % ((1 << distMax) - 1),
+		'\t\tn = e & 15',
+		'\t\tbuf >>= n',
+		'\t\tavail -= n',
+		'\t\tsymbol = e >> 4',
+	]
+	lines += generateRefill(13, 2)
+	lines += [
+		'\t\tn = DIST_EXTRA[symbol]',
+		'\t\tdist = DIST_BASE[symbol] + (buf & ((1 << n) - 1))',
+		'\t\tbuf >>= n',
+		'\t\tavail -= n',
+		'\t\tstart = len(window) - dist',
+		'\t\tif dist >= length:',
+		'\t\t\twindow += window[start : start + length]',
+		'\t\telse:',
+		'\t\t\twindow += (window[start:] * (length // dist + 1))[:length]',
+		'\tgz.bits_buffer = buf',
+		'\tgz.available_bits = avail',
+		'\tgz.inPos = pos',
+		'\treturn False',
+	]
+
+	namespace = {'LIT': litTable, 'DIST': distTable, 'LENGTH_BASE': tuple(LENGTH_BASE), 'LENGTH_EXTRA': tuple(LENGTH_EXTRA), 'DIST_BASE': tuple(DIST_BASE), 'DIST_EXTRA': tuple(DIST_EXTRA)}
+	exec(compile('\n'.join(lines) + '\n', '<decodeBlock %d/%d>' % (litMax, distMax), 'exec'), namespace)
+	return namespace['decodeBlock']
+
+#Função responsável por retornar o descodificador especializado de um par de alfabetos, gerando-o apenas se os comprimentos não estiverem na cache.
+#Quando a cache fica cheia, é descartado o descodificador usado há mais tempo.
+def getDecoder(litLengths, distLengths):
+	key = (tuple(litLengths), tuple(distLengths))
+	decoder = DECODER_CACHE.get(key)
+	if decoder is None:
+		decoder = generateDecoder(litLengths, distLengths)
+		DECODER_CACHE[key] = decoder
+		if len(DECODER_CACHE) > DECODER_CACHE_SIZE:
+			DECODER_CACHE.popitem(last=False)
+	else:
+		DECODER_CACHE.move_to_end(key)
+	return decoder
+
+#O descodificador dos códigos de Huffman fixos é gerado uma única vez, ao importar o módulo, e nunca sai da memória.
+FIXED_DECODER = generateDecoder(FIXED_LIT_LENGTHS, FIXED_DIST_LENGTHS)
+
+#Função responsável por comprimir os dados de um membro BGZF (Um membro gzip independente com o campo extra BC, que guarda o tamanho total do membro - 1).
+#Se os dados não forem compressíveis o suficiente para caber em 64 KiB, são guardados num bloco sem compressão (level = 0). Se nem assim couberem (Mais de BGZF_BLOCK_SIZE bytes), é lançado um ValueError.
+def compressBGZFBlock(data, level=6):
+	c = zlib.compressobj(level, zlib.DEFLATED, -15)
+	deflated = c.compress(data) + c.flush()
+	if len(deflated) + 26 > 65536:
+		if level == 0:
+			raise ValueError('Block of %d bytes does not fit in a BGZF member' % len(data))
+		return compressBGZFBlock(data, 0)
+
+	header = b'\x1f\x8b\x08\x04' + b'\x00' * 4 + b'\x00\xff' + struct.pack('<HBBHH', 6, 66, 67, 2, len(deflated) + 25)
+	trailer = struct.pack('<II', zlib.crc32(data), len(data))
+	return header + deflated + trailer
+
+#Função responsável por descomprimir um membro do ficheiro fileName que começa na posição offset. Usada pelos processos que descomprimem membros BGZF em paralelo.
+def decompressMember(fileName, offset):
+	gz = GZIP(fileName)
+	gz.f.seek(offset)
+
+	gz.requireHeader()
+	data = b''.join(gz.inflate(codegen=True, allMembers=False))
+
+	gz.close()
+	return data
+
+#Classe responsável por disponibilizar os dados descomprimidos como um ficheiro só de leitura (Método read), à medida que são produzidos por um gerador de chunks (Ex: GZIP.inflate).
+#Apenas os dados ainda não lidos são mantidos em memória.
+class InflateReader:
+	chunks = None
+	buffer = b''
+	pos = 0
+
+	def __init__(self, chunks):
+		self.chunks = chunks
+		self.buffer = b''
+		self.pos = 0
+
+	#Método responsável por ler até n bytes (Todos os restantes se n < 0). Retorna b'' no fim dos dados.
+	def read(self, n=-1):
+		while n < 0 or len(self.buffer) - self.pos < n:
+			chunk = next(self.chunks, None)
+			if chunk is None:
+				break
+			self.buffer = self.buffer[self.pos:] + chunk
+			self.pos = 0
+
+		if n < 0:
+			n = len(self.buffer) - self.pos
+
+		data = self.buffer[self.pos : self.pos + n]
+		self.pos += len(data)
+		return data
+
 #Classe responsável por ler e armazenar os campos do cabeçalho (Header) do ficheiro gzip.
 class GZIPHeader:
 	#Os campos ID1 e ID2, inicializados com o valor 0, representam um número que identifica o tipo de ficheiro (ID1 = 0x1f, ID2 = 0x8b).
@@ -28,8 +376,14 @@ class GZIPHeader:
 	FLG_FTEXT = FLG_FHCRC = FLG_FEXTRA = FLG_FNAME = FLG_FCOMMENT = 0   
 	# FLG_FTEXT --> ignored (usually 0)
 	# if FLG_FEXTRA == 1
+	#O campo subfields contém os subcampos do campo extra, indexados pelo seu identificador (SI1 SI2).
+	#O campo BSIZE contém o tamanho total do membro - 1 (Subcampo BC dos ficheiros BGZF), ou -1 caso o membro não seja BGZF.
+	#O campo index contém o índice .gzi de um ficheiro BGZF: pares (posição no ficheiro comprimido, posição no ficheiro original) do início de cada membro.
 	XLEN, extraField = [], []
 	lenXLEN = 2
+	subfields = {}
+	BSIZE = -1
+	index = []
 	# if FLG_FNAME == 1
 	fName = ''  # ends when a byte with value 0 is read
 	# if FLG_FCOMMENT == 1
@@ -88,10 +442,21 @@ class GZIPHeader:
 			self.XLEN = [0]*self.lenXLEN
 			self.XLEN[0] = f.read(1)[0]
 			self.XLEN[1] = f.read(1)[0]
-			self.xlen = self.XLEN[1] << 8 + self.XLEN[0]
+			self.xlen = (self.XLEN[1] << 8) + self.XLEN[0]
 			
-			# read extraField and ignore its values
+			# read extraField
+			#O campo extra é composto por subcampos: 2 bytes de identificador, 2 bytes de comprimento (LEN) e LEN bytes de dados.
 			self.extraField = f.read(self.xlen)
+			self.subfields = {}
+			pos = 0
+			while pos + 4 <= self.xlen:
+				SI = self.extraField[pos : pos + 2]
+				LEN = self.extraField[pos + 2] + (self.extraField[pos + 3] << 8)
+				self.subfields[SI] = self.extraField[pos + 4 : pos + 4 + LEN]
+				pos += 4 + LEN
+
+			if b'BC' in self.subfields and len(self.subfields[b'BC']) == 2:
+				self.BSIZE = self.subfields[b'BC'][0] + (self.subfields[b'BC'][1] << 8)
 		
 		#Os valores das flags FLG_FNAME, GLG_FCOMMENT e FLG_FHRC correspondem a códigos de 0's e 1's e estes são lidos até surgir o primeiro 0.
 		def read_str_until_0(f):
@@ -119,6 +484,18 @@ class GZIPHeader:
 			
 		return 0
 
+	#Método responsável por ler o índice .gzi de um ficheiro BGZF: um inteiro de 64 bits com o número de entradas, seguido dos pares (posição comprimida, posição original) de 64 bits (Little endian).
+	#O primeiro membro, que começa em (0, 0), não consta do ficheiro mas é adicionado ao índice.
+	def readIndex(self, f):
+		count = struct.unpack('<Q', f.read(8))[0]
+		entries = struct.unpack('<%dQ' % (2 * count), f.read(16 * count))
+
+		self.index = [(0, 0)]
+		for i in range(count):
+			self.index.append((entries[2 * i], entries[2 * i + 1]))
+
+		return self.index
+
 #Classe responsável pela deescompressão do ficheiro gzip caso este tenho sido comprimido através do método de compressão deflate.
 class GZIP:
 	#O campo gzh representa/irá conter o cabeçalho (Header) do ficheiro gzip.
@@ -127,44 +504,79 @@ class GZIP:
 	#O campo origFileSize representa/irá conter o tamanho do ficheiro original, antes da compressão.
 	#O campo numBlocks representa/irá conter o número de blocos
 	#O campo f representa o "ficheiro".
+	#O campo ownsFile indica se o ficheiro foi aberto pela classe (E se deve ser fechado por ela).
+	#Os campos inBuffer e inPos representam o bloco de bytes lido do ficheiro (READ_SIZE bytes de cada vez) e a posição do próximo byte a consumir.
+	#O campo CRC32 representa/irá conter o CRC-32 lido do trailer do ficheiro.
 	gzh = None
 	gzFile = ''
 	fileSize = origFileSize = -1
 	numBlocks = 0
 	f = None
+	ownsFile = False
+	CRC32 = -1
+
+	inBuffer = b''
+	inPos = 0
 	
 	bits_buffer = 0
 	available_bits = 0		
 
 	#contrutor responsável pela inicialização da classe que recebe como parâmetro o nome do ficheiro a descomprimir (filename).
+	#O parâmetro filename pode também ser '-' (stdin) ou qualquer objeto binário com o método read (Pipes, sockets, ficheiros já abertos), lido a partir da posição atual.
 	#O campo gzFile é responável por guardar o nome do ficheiro.
 	#O campo f é responsável por abrir o ficheiro (Em binário).
-	#O campo f.seek(0, 2) coloca o "cursor" no inicio do ficheiro até ao ponto de referência 2, que corresponde ao fim do ficheiro, de forma a que o seu tamanho seja obtido no campo seguinte.
-	#O campo fileSize é responsável por obter o tamanho do ficheiro ataravés da funcão tell.
-	#O campo f.seek(0) coloca o "cursor" no inicio do ficheiro.
+	#Se o ficheiro permitir seek, f.seek(0, 2) coloca o "cursor" no fim do ficheiro, de forma a que o seu tamanho seja obtido através da funcão tell, e o "cursor" volta depois à posição inicial.
+	#Caso contrário, fileSize fica a -1 e o tamanho original é obtido do trailer, depois do último bloco.
 	def __init__(self, filename):
-		self.gzFile = filename
-		self.f = open(filename, 'rb')
-		self.f.seek(0,2)
-		self.fileSize = self.f.tell()
-		self.f.seek(0)
+		if filename == '-':
+			self.gzFile = filename
+			self.f = sys.stdin.buffer
+			self.ownsFile = False
+
+		elif hasattr(filename, 'read'):
+			self.gzFile = getattr(filename, 'name', '')
+			if not isinstance(self.gzFile, str):
+				self.gzFile = ''
+			self.f = filename
+			self.ownsFile = False
+
+		else:
+			self.gzFile = filename
+			self.f = open(filename, 'rb')
+			self.ownsFile = True
+
+		self.inBuffer = b''
+		self.inPos = 0
+
+		if self.isSeekable():
+			fp = self.f.tell()
+			self.f.seek(0,2)
+			self.fileSize = self.f.tell()
+			self.f.seek(fp)
+
+	#Método responsável por indicar se o ficheiro permite seek (Ficheiros em disco) ou não (stdin, pipes, sockets).
+	def isSeekable(self):
+		try:
+			return self.f.seekable()
+		except (AttributeError, ValueError):
+			return False
+
+	#Método responsável por fechar o ficheiro, caso tenha sido aberto pela classe.
+	def close(self):
+		if self.ownsFile:
+			self.f.close()
 
 	#Método principal responsável pela descompressão do ficheiro gzip através de um algoritmo deflate.
 	def decompress(self):
 		#A variável numBlocks representa o número de blocos lidos, inicializado a 0.
 		numBlocks = 0
 
-		# get original file size: size of file before compression
-		#A variável origFileSize representa o tamanho do ficheiro antes da compressão, obtio pelo método getOrigFileSize() da classe GZIP. Este valor é impresso seguidamente.
-		origFileSize = self.getOrigFileSize()
-		print(origFileSize)
-		
+		#As variáveis crc e size contêm o CRC-32 e o tamanho dos dados descomprimidos, validados no fim com o trailer.
+		crc = size = 0
+
 		# read GZIP header
 		#É lido o cabeçalho (Header) do ficheiro gzip. A variável error irá conter o valor 0 caso a leitura seja efetuada com sucesso. Caso contrário é impressa uma mensagem de erro e o programa é encerrado. 
-		error = self.getHeader()
-		if error != 0:
-			print('Formato invalido!')
-			return
+		self.requireHeader()
 		
 		# show filename read from GZIP header
 		#É imprimido o nome do ficheiro lido do cabeçalho (Header) do ficheiro gzip.
@@ -178,11 +590,10 @@ class GZIP:
 			#É lido o bit do BFINAL através do método readBits da classe GZIP.
 			BFINAL = self.readBits(1)   #É lido 1 bit do buffer (bits_buffer).
 							
-			#Se o valor de BTYPE for igual a 2 (10 em binário) indica que o bloco foi comprimido com Huffman Dinâmico. Caso contrário é impressa uma mensagem de erro e o programa é encerrado.
+			#Se o valor de BTYPE for igual a 2 (10 em binário) indica que o bloco foi comprimido com Huffman Dinâmico. Caso contrário é lançada uma GZIPError.
 			BTYPE = self.readBits(2)   #São lidos 2 bits do buffer (bits_buffer).				
 			if BTYPE != 2:
-				print('Error: Block %d not coded with Huffman Dynamic coding' % (numBlocks+1))
-				return
+				raise GZIPError('Block %d not coded with Huffman Dynamic coding' % (numBlocks+1))
 					
 			#--- STUDENTS --- ADD CODE HERE
 			# 
@@ -278,17 +689,25 @@ class GZIP:
 
 			print("\n" + str(decompressedOutput))
 
+			crc = zlib.crc32(bytes(decompressedOutput), crc)
+			size += len(decompressedOutput)
+
 			#-------------------------Exercício 8-------------------------
 
-			self.writeFile(decompressedOutput)   #Cria e escreve o conteúdo original num ficheiro de texto com o nome original.
+			self.writeFile(decompressedOutput, numBlocks > 0)   #Cria (No primeiro bloco) e escreve o conteúdo original num ficheiro com o nome original.
 
 			# update number of blocks read
 			#É incrementado em 1 valor o número de blocos lidos.
 			numBlocks += 1
 
+		# get original file size: size of file before compression
+		#O trailer (CRC-32 e tamanho do ficheiro antes da compressão) é lido depois do último bloco, pelo que não é necessário fazer seek (Funciona também com o stdin). O tamanho original é impresso seguidamente.
+		self.checkTrailer(crc, size)
+		print(self.origFileSize)
+
 		# close file			
 		
-		self.f.close()	
+		self.close()
 		print("End: %d block(s) analyzed." % numBlocks)
 	
 	#Método responsável por ler o formato do bloco, de acordo com a estrutura de cada um (Slide 40 DOC1 / Slide 12 DOC2).
@@ -373,6 +792,9 @@ class GZIP:
 				zeroPosition = 8 - codeLengthsAux[i]   #São removidos os 0's em excesso à esquerda (Tal ocorre somente nos códigos de comprimento inferior a 8).
 				huffmanCodes[i] = huffmanCodes[i][zeroPosition : len(huffmanCodes[i])]
 
+			elif (codeLengthsAux[i] > 8):
+				huffmanCodes[i] = huffmanCodes[i].zfill(codeLengthsAux[i])   #Nos códigos de comprimento superior a 8 são adicionados os 0's em falta à esquerda.
+
 		codeSymbols = [i for i in range(len(codeLengthsArray)) if codeLengthsArray[i] != 0]   #Remove os símbolos cujo valor do comprimento seja igual a 0.
 		for i in range(len(codeSymbols)):
 			huffmanCodesDic.setdefault(codeSymbols[i], huffmanCodes[i])
@@ -380,9 +802,9 @@ class GZIP:
 		return huffmanCodesDic
 
 	#Método responsável por gerar a árvore de Huffman e adicionar os códigos dos comprimentos de códigos.
-	def generateTree(self, huffmanCodes):
+	#O campo verbose disponibiliza uma mensagem após a inserção na árvore.
+	def generateTree(self, huffmanCodes, verbose=True):
 		hft = HuffmanTree()   #Inicializa uma árvore de Huffman.
-		verbose = True   #Campo verbose que disponibiliza uma mensagem após a inserção na árvore.
 
 		for i in huffmanCodes.keys():
 			hft.addNode(huffmanCodes[i], i, verbose)   #huffmanCodes[i] -> código de Huffman, i -> índice do código no alfabeto, verbose -> True ou False.
@@ -474,6 +896,9 @@ class GZIP:
 				if (pos < 256):   #Se o valor de pos for inferior a 256 (Códigos de literais), o valor é adicionado ao array de valores ASCII.
 					outputAscii.append(pos)
 
+				elif (pos == 256):   #Fim do bloco: não há bits extra a ler.
+					pass
+
 				else:   #Caso contrário, é ncessário ler bits extra (Códigos de comprimento).
 					size = [0, 0]
 
@@ -490,7 +915,7 @@ class GZIP:
 						for i in range(1, bitsToRead):
 							aux += (4 * (2 ** i))   #Incrementa o valor a somar ao length mínimo conforme o valor em bitsToRead (Bits a ler).
 
-						aux += self.readBits(bitsToRead)   #Valor do comprimento para o símbolo na variável pos.
+						aux += ((pos - 265) % 4) * (2 ** bitsToRead) + self.readBits(bitsToRead)   #Valor do comprimento para o símbolo na variável pos (Tal como nas distâncias, cada um dos 4 símbolos com o mesmo número de bits extra começa num valor diferente).
 						
 						size[0] = aux
 
@@ -513,7 +938,11 @@ class GZIP:
 
 						size[1] = aux
 
+					#Cada bloco é descomprimido isoladamente, pelo que uma distância que aponte para um bloco anterior não é suportada (inflate trata esse caso).
 					start = len(outputAscii) - size[1]
+					if start < 0:
+						raise GZIPError('Distance %d reaches before the start of the block' % size[1])
+
 					for i in range(size[0]):
 						outputAscii += [outputAscii[start + i]]
 	
@@ -521,24 +950,413 @@ class GZIP:
 
 		return outputAscii
 
-	#Método responsável por gravar os dados descompactados num ficheiro com o nome original.
-	def writeFile(self, decompressedData):
-		fileName = self.gzh.fName   #Nome original do ficheiro previamente guardado na estrutura GZIPHeader, nomeadamente no campo fName.
+	#Método responsável por ler os comprimentos dos códigos de um bloco dinâmico (Exercícios 1 a 5) sem imprimir os valores intermédios.
+	#Retorna os comprimentos dos códigos do alfabeto de literais/comprimentos e do alfabeto de distâncias.
+	def readDynamicLengths(self):
+		HLIT, HDIST, HCLEN = self.readBlockFormat()
 
-		f = open(fileName, "w")   #Cria um ficheiro com o nome fileName em write mode.
+		codeLengthsOrder = [16, 17, 18, 0, 8, 7, 9, 6, 10, 5, 11, 4, 12, 3, 13, 2, 14, 1, 15]
+		codeLengths = self.codeLengthsValue(HCLEN, codeLengthsOrder)
+		hft = self.generateTree(self.codeLengthsHuffman(codeLengths), False)
 
-		dataString = ""   #É inicializa a string dataString que irá conter todo o conteúdo a escrever no ficheiro.
-		for i in decompressedData:
-			dataString = dataString + chr(i)
-		
-		f.write(dataString)   #É escrito o conteúdo da string dataString no ficheiro.
+		literalLengthsHLIT = self.literalLengthValues(hft, HLIT)
+		literalLengthsHDIST = self.literalLengthValues(hft, HDIST)
+
+		return literalLengthsHLIT, literalLengthsHDIST
+
+	#Método responsável por ler as árvores de Huffman de um bloco dinâmico (Exercícios 1 a 6) sem imprimir os valores intermédios.
+	#Retorna a árvore do alfabeto de literais/comprimentos e a árvore do alfabeto de distâncias.
+	def readDynamicTrees(self):
+		literalLengthsHLIT, literalLengthsHDIST = self.readDynamicLengths()
+
+		hftHLIT = self.generateTree(self.codeLengthsHuffman(literalLengthsHLIT), False)
+		hftHDIST = self.generateTree(self.codeLengthsHuffman(literalLengthsHDIST), False)
+
+		return hftHLIT, hftHDIST
+
+	#Método responsável por descodificar os símbolos de um bloco diretamente para a janela (window), um bytearray com o histórico do LZ77.
+	#A descodificação pára no fim do bloco (Retorna True) ou assim que a janela atinge o tamanho limit (Retorna False). Como pára sempre entre símbolos, pode ser retomada com uma nova chamada.
+	def decodeSymbols(self, hftHLIT, hftHDIST, window, limit):
+		while (len(window) < limit):
+			pos = -2
+			while (pos < 0):
+				pos = hftHLIT.nextNode(str(self.readBits(1)))
+			hftHLIT.resetCurNode()
+
+			if (pos < 256):   #Literal.
+				window.append(pos)
+
+			elif (pos == 256):   #Fim do bloco.
+				return True
+
+			else:   #Par comprimento/distância.
+				length = LENGTH_BASE[pos - 257] + self.readBits(LENGTH_EXTRA[pos - 257])
+
+				distCode = -2
+				while (distCode < 0):
+					distCode = hftHDIST.nextNode(str(self.readBits(1)))
+				hftHDIST.resetCurNode()
+
+				dist = DIST_BASE[distCode] + self.readBits(DIST_EXTRA[distCode])
+
+				start = len(window) - dist
+				if (dist >= length):   #Sem sobreposição, a cópia é feita de uma só vez.
+					window += window[start : start + length]
+
+				else:   #Com sobreposição, a cópia é feita byte a byte.
+					for i in range(length):
+						window.append(window[start + i])
+
+		return False
+
+	#Gerador responsável pela descompressão em streaming dos blocos do ficheiro, produzindo somente os bytes do intervalo [start, end) (end = None corresponde ao fim do ficheiro).
+	#Antes de start apenas é mantida a janela de 32 KiB, não sendo alocado nem produzido qualquer output. A descodificação termina logo que end é atingido, sem ler os blocos seguintes.
+	#Se codegen for True, os símbolos são descodificados pelos descodificadores especializados (getDecoder) em vez de decodeSymbols.
+	#Se allMembers for True, depois do trailer de cada membro são lidos os membros seguintes (Enquanto houver dados no ficheiro). Caso contrário, apenas o membro atual é descomprimido.
+	def inflate(self, start=0, end=None, codegen=False, allMembers=True):
+		if start < 0 or (end is not None and end < start):
+			raise ValueError('Invalid range: start = %d, end = %s' % (start, end))
+
+		window = bytearray()   #Histórico do LZ77 (Entre WINDOW_SIZE e 2 * WINDOW_SIZE bytes).
+		base = 0   #Posição, no ficheiro original, do primeiro byte da janela.
+		emitted = start   #Posição até à qual o output já foi produzido.
+		checkCRC = start == 0 and end is None   #O CRC-32 só é calculado quando o ficheiro é descomprimido por inteiro.
+
+		numBlocks = 0
+		while True:
+			memberStart = base + len(window)   #Posição, no ficheiro original, do início do membro atual.
+			crc = 0
+
+			BFINAL = 0
+			while not BFINAL == 1:
+				BFINAL, BTYPE, literalLengthsHLIT, literalLengthsHDIST, storedLength = self.readBlockStart(numBlocks)
+
+				if BTYPE == 0:
+					pass
+				elif codegen and BTYPE == 1:
+					decodeBlock = FIXED_DECODER
+				elif codegen:
+					decodeBlock = getDecoder(literalLengthsHLIT, literalLengthsHDIST)
+				else:
+					hftHLIT = self.generateTree(self.codeLengthsHuffman(literalLengthsHLIT), False)
+					hftHDIST = self.generateTree(self.codeLengthsHuffman(literalLengthsHDIST), False)
+
+				endOfBlock = False
+				while not endOfBlock:
+					if end is not None and base + len(window) >= end:
+						return
+
+					limit = 2 * WINDOW_SIZE
+					if end is not None:
+						limit = min(limit, end - base)
+
+					if BTYPE == 0:
+						n = min(storedLength, limit - len(window))
+						window += self.readBytes(n)
+						storedLength -= n
+						endOfBlock = storedLength == 0
+					elif codegen:
+						endOfBlock = decodeBlock(self, window, limit)
+					else:
+						endOfBlock = self.decodeSymbols(hftHLIT, hftHDIST, window, limit)
+
+					top = base + len(window)
+					if end is not None:
+						top = min(top, end)
+
+					if top > emitted:
+						chunk = bytes(window[emitted - base : top - base])
+						if checkCRC:
+							crc = zlib.crc32(chunk, crc)
+						yield chunk
+						emitted = top
+
+					if len(window) > WINDOW_SIZE:   #São descartados os bytes que já não podem ser referenciados.
+						cut = len(window) - WINDOW_SIZE
+						del window[:cut]
+						base += cut
+
+				numBlocks += 1
+				self.numBlocks = numBlocks
+
+			self.checkTrailer(crc if checkCRC else None, base + len(window) - memberStart)
+
+			#Um ficheiro gzip pode ter vários membros seguidos (Ex: BGZF), cujos dados descomprimidos são concatenados.
+			if not allMembers or not self.hasMoreInput():
+				return
+
+			self.requireHeader()
+
+	#Método responsável pela leitura do início de um bloco: BFINAL, BTYPE e, conforme o tipo, os comprimentos dos códigos (Huffman dinâmico ou fixo) ou o número de bytes (Sem compressão).
+	#Retorna BFINAL, BTYPE, os comprimentos dos códigos dos dois alfabetos (None nos blocos sem compressão) e o número de bytes do bloco sem compressão (0 nos restantes).
+	def readBlockStart(self, numBlocks):
+		BFINAL = self.readBits(1)
+		BTYPE = self.readBits(2)
+		literalLengthsHLIT = literalLengthsHDIST = None
+		storedLength = 0
+
+		if BTYPE == 2:   #Huffman dinâmico.
+			literalLengthsHLIT, literalLengthsHDIST = self.readDynamicLengths()
+
+		elif BTYPE == 1:   #Huffman fixo.
+			literalLengthsHLIT, literalLengthsHDIST = FIXED_LIT_LENGTHS, FIXED_DIST_LENGTHS
+
+		elif BTYPE == 0:   #Sem compressão: LEN e NLEN (Complemento de LEN) seguidos de LEN bytes.
+			storedHeader = self.readBytes(4)
+			storedLength = storedHeader[0] + (storedHeader[1] << 8)
+
+		else:
+			raise GZIPError('Block %d with invalid BTYPE' % (numBlocks+1))
+
+		return BFINAL, BTYPE, literalLengthsHLIT, literalLengthsHDIST, storedLength
 
+	#Método responsável pela primeira fase do motor de duas fases: descodifica todos os símbolos de um bloco para um objeto DeflateTokens, sem os expandir.
+	def decodeTokens(self, hftHLIT, hftHDIST):
+		tokens = DeflateTokens()
+		run = 0   #Número de literais desde o último par comprimento/distância.
+
+		while True:
+			pos = -2
+			while (pos < 0):
+				pos = hftHLIT.nextNode(str(self.readBits(1)))
+			hftHLIT.resetCurNode()
+
+			if (pos < 256):   #Literal.
+				tokens.literals.append(pos)
+				run += 1
+
+			elif (pos == 256):   #Fim do bloco.
+				break
+
+			else:   #Par comprimento/distância.
+				length = LENGTH_BASE[pos - 257] + self.readBits(LENGTH_EXTRA[pos - 257])
+
+				distCode = -2
+				while (distCode < 0):
+					distCode = hftHDIST.nextNode(str(self.readBits(1)))
+				hftHDIST.resetCurNode()
+
+				tokens.litRuns.append(run)
+				tokens.lengths.append(length)
+				tokens.distances.append(DIST_BASE[distCode] + self.readBits(DIST_EXTRA[distCode]))
+				run = 0
+
+		tokens.litRuns.append(run)
+		return tokens
+
+	#Gerador responsável por retornar, bloco a bloco, os tokens (DeflateTokens) do ficheiro. Útil para análise ou para uma expansão em paralelo.
+	def tokenBlocks(self):
+		numBlocks = 0
+		BFINAL = 0
+		while not BFINAL == 1:
+			BFINAL, BTYPE, literalLengthsHLIT, literalLengthsHDIST, storedLength = self.readBlockStart(numBlocks)
+
+			if BTYPE == 0:   #Sem compressão: todos os bytes do bloco são literais.
+				tokens = DeflateTokens()
+				tokens.literals.frombytes(self.readBytes(storedLength))
+				tokens.litRuns.append(storedLength)
+			else:
+				hftHLIT = self.generateTree(self.codeLengthsHuffman(literalLengthsHLIT), False)
+				hftHDIST = self.generateTree(self.codeLengthsHuffman(literalLengthsHDIST), False)
+				tokens = self.decodeTokens(hftHLIT, hftHDIST)
+
+			yield tokens
+
+			numBlocks += 1
+			self.numBlocks = numBlocks
+
+	#Gerador responsável pela descompressão com o motor de duas fases: cada bloco é primeiro descodificado para tokens e depois expandido (expandTokens).
+	def inflateTokens(self):
+		while True:
+			history = b''
+			crc = size = 0
+			for tokens in self.tokenBlocks():
+				data = expandTokens(tokens, history)
+				history = (history + data)[-WINDOW_SIZE:]
+				crc = zlib.crc32(data, crc)
+				size += len(data)
+				yield data
+
+			self.checkTrailer(crc, size)
+
+			if not self.hasMoreInput():   #Membros seguintes, tal como em inflate.
+				return
+
+			self.requireHeader()
+
+	#Método responsável por descomprimir somente os bytes [start, start + length) do ficheiro original, retornando-os.
+	#Se o ficheiro for BGZF e tiver um índice .gzi, são descomprimidos somente os membros que contêm o intervalo, em paralelo.
+	def extract_range(self, start, length, codegen=False):
+		if start < 0 or length < 0:   #Um início negativo seria lido a partir do fim da janela.
+			raise ValueError('Invalid range: start and length must not be negative')
+
+		self.requireHeader()
+
+		if self.gzh.BSIZE != -1 and self.getIndex():
+			self.close()
+			return self.extractRangeIndexed(start, length)
+
+		data = b''.join(self.inflate(start, start + length, codegen))
+
+		self.close()
+		return data
+
+	#Método responsável por ler, caso exista, o índice .gzi do ficheiro (Com o mesmo nome do ficheiro e a extensão .gzi). Retorna o índice ou None.
+	def getIndex(self):
+		indexName = self.gzFile + '.gzi'
+		if not os.path.exists(indexName):
+			return None
+
+		f = open(indexName, 'rb')
+		index = self.gzh.readIndex(f)
+		f.close()
+
+		return index
+
+	#Método responsável por extrair os bytes [start, start + length) de um ficheiro BGZF com índice: os membros que contêm o intervalo são descomprimidos em paralelo (Processos distintos).
+	def extractRangeIndexed(self, start, length):
+		index = self.gzh.index
+		origOffsets = [entry[1] for entry in index]
+
+		first = bisect.bisect_right(origOffsets, start) - 1
+		last = max(first, bisect.bisect_left(origOffsets, start + length) - 1)
+		offsets = [entry[0] for entry in index[first : last + 1]]
+
+		if len(offsets) == 1:
+			members = [decompressMember(self.gzFile, offsets[0])]
+		else:
+			with ProcessPoolExecutor() as pool:
+				members = list(pool.map(decompressMember, [self.gzFile] * len(offsets), offsets))
+
+		data = b''.join(members)
+		skip = start - origOffsets[first]
+		return data[skip : skip + length]
+
+	#Método responsável por extrair um ficheiro .tar.gz para a pasta destDir diretamente a partir dos dados descomprimidos, sem escrever o .tar em disco.
+	#O tar é lido em modo stream (r|), pelo que cada membro é escrito à medida que chega e a memória usada é constante.
+	#Se patterns for indicado, apenas são considerados os membros cujo nome corresponde a um dos padrões (glob). Se listOnly for True, os nomes são impressos e os dados dos membros são ignorados.
+	#Retorna o número de membros extraídos (Ou listados). Os nomes listados são os únicos dados escritos no stdout; os erros são lançados como exceções.
+	def extractTar(self, destDir='.', patterns=None, listOnly=False):
+		self.requireHeader()
+
+		reader = InflateReader(self.inflate(codegen=True))
+		tar = tarfile.open(fileobj=reader, mode='r|')
+		if hasattr(tarfile, 'data_filter'):   #Impede a escrita fora de destDir (Python >= 3.11.4).
+			tar.extraction_filter = tarfile.data_filter
+
+		count = 0
+		member = tar.next()
+		while member is not None:
+			if not patterns or any(fnmatch.fnmatch(member.name, p) for p in patterns):
+				count += 1
+				if listOnly:
+					print(member.name)
+				else:
+					tar.extract(member, destDir)
+
+			tar.members = []   #Em modo stream, o tarfile guarda todos os membros já lidos. São descartados para que a memória usada seja constante.
+			member = tar.next()
+
+		#O tarfile pára no marcador de fim do arquivo, pelo que os dados restantes são descomprimidos (E descartados) para que o trailer seja validado.
+		for chunk in reader.chunks:
+			pass
+
+		tar.close()
+		self.close()
+
+		return count
+
+	#Método responsável por converter o ficheiro num ficheiro BGZF (outName): os dados descomprimidos em streaming são divididos em membros independentes de blockSize bytes, comprimidos em paralelo com o zlib.
+	#É também escrito o índice outName.gzi, com as posições de início de cada membro, para que leituras futuras possam saltar diretamente para o membro pretendido.
+	#blockSize tem de estar entre 1 e BGZF_BLOCK_SIZE, para que cada membro caiba nos 64 KiB do BGZF mesmo sem compressão.
+	def toBGZF(self, outName, blockSize=BGZF_BLOCK_SIZE):
+		if not 0 < blockSize <= BGZF_BLOCK_SIZE:
+			raise ValueError('Invalid block size: %d (must be between 1 and %d)' % (blockSize, BGZF_BLOCK_SIZE))
+
+		self.requireHeader()
+
+		out = open(outName, 'wb')
+		index = []
+		compressedOffset = origOffset = 0
+
+		#Os membros são escritos pela ordem original. O número de membros em compressão é limitado, para que a memória usada seja constante.
+		def writeMember(future, size):
+			nonlocal compressedOffset, origOffset
+			member = future.result()
+			if compressedOffset > 0:
+				index.append((compressedOffset, origOffset))
+			out.write(member)
+			compressedOffset += len(member)
+			origOffset += size
+
+		with ProcessPoolExecutor() as pool:
+			maxPending = 4 * (os.cpu_count() or 1)
+			pending = []
+			buffer = bytearray()
+
+			for chunk in self.inflate(codegen=True):
+				buffer += chunk
+				while len(buffer) >= blockSize:
+					pending.append((pool.submit(compressBGZFBlock, bytes(buffer[:blockSize])), blockSize))
+					del buffer[:blockSize]
+					if len(pending) >= maxPending:
+						writeMember(*pending.pop(0))
+
+			if len(buffer) > 0:
+				pending.append((pool.submit(compressBGZFBlock, bytes(buffer)), len(buffer)))
+
+			for future, size in pending:
+				writeMember(future, size)
+
+		out.write(BGZF_EOF)
+		out.close()
+		self.close()
+
+		f = open(outName + '.gzi', 'wb')
+		f.write(struct.pack('<Q', len(index)))
+		for entry in index:
+			f.write(struct.pack('<QQ', entry[0], entry[1]))
 		f.close()
 
 		return
+
+	#Método responsável por gravar os dados descompactados num ficheiro com o nome original (Escolhido tal como em writeStream).
+	#Se append for True, os dados são acrescentados ao ficheiro (Blocos seguintes ao primeiro).
+	def writeFile(self, decompressedData, append=False):
+		self.writeStream([bytes(decompressedData)], "ab" if append else "wb")
+
+		return
 	
+	#Método responsável por gravar num ficheiro com o nome original os blocos de dados descompactados (chunks), à medida que são produzidos.
+	#Se o cabeçalho não tiver o nome original, é usado o nome do ficheiro comprimido sem a extensão .gz. Se também este não for conhecido (stdin, pipes), os dados são escritos no stdout.
+	def writeStream(self, chunks, mode="wb"):
+		fileName = self.gzh.fName
+		if fileName == '' and self.gzFile.endswith('.gz'):
+			fileName = self.gzFile[:-3]
+		elif fileName == '' and self.gzFile not in ('', '-'):
+			fileName = self.gzFile + '.out'
+
+		if fileName == '':
+			f = sys.stdout.buffer
+		else:
+			f = open(fileName, mode)
+
+		for chunk in chunks:
+			f.write(chunk)
+
+		if f is sys.stdout.buffer:
+			f.flush()
+		else:
+			f.close()
+
+		return
+
 	#Método responsável por ler o tamanho original do ficheiro antes da compressão.
+	#Se o ficheiro não permitir seek, é retornado -1 (O tamanho original só é conhecido depois de ler o trailer, em checkTrailer).
 	def getOrigFileSize(self):
+		if not self.isSeekable():
+			return self.origFileSize
+
 		# saves current position of file pointer
 		#A variável fp representa a posição atual do "cursor".
 		fp = self.f.tell()
@@ -564,15 +1382,77 @@ class GZIP:
 	#Se a leitura do cabeçalho (Header) for efetuada com sucesso, é retornado o valor 0 pelo método read da classe GZIPHeader, na variável header_error.
 	def getHeader(self):
 		self.gzh = GZIPHeader()
-		header_error = self.gzh.read(self.f)
+		header_error = self.gzh.read(self)   #O cabeçalho é lido através do método read, a partir do bloco de bytes já lido.
 		return header_error
 	
+	#Método responsável pela leitura do cabeçalho (Header), lançando GZIPError se este for inválido.
+	def requireHeader(self):
+		if self.getHeader() != 0:
+			raise GZIPError('Formato invalido!')
+
+	#Método responsável pela leitura de n bytes a partir do próximo byte completo (Os bits que faltam para completar o byte atual são descartados).
+	#Os bytes que já se encontram no bits_buffer são usados primeiro.
+	def readBytes(self, n):
+		self.readBits(self.available_bits % 8)
+
+		data = bytearray()
+		while n > 0 and self.available_bits >= 8:
+			data.append(self.readBits(8))
+			n -= 1
+
+		data += self.read(n)
+		return bytes(data)
+
+	#Método responsável por ler o próximo bloco de READ_SIZE bytes do ficheiro, mantendo os bytes do bloco atual que ainda não foram consumidos.
+	#É usado read1, quando disponível, para que pipes e sockets não fiquem à espera de um bloco completo.
+	#Se o ficheiro já tiver terminado e required for True (Ainda é necessário pelo menos um byte), é lançada uma GZIPError.
+	def fillBuffer(self, required=True):
+		read = getattr(self.f, 'read1', self.f.read)
+		chunk = read(READ_SIZE)
+		if not chunk and required:
+			raise GZIPError('Unexpected end of input')
+
+		self.inBuffer = self.inBuffer[self.inPos:] + chunk
+		self.inPos = 0
+
+	#Método responsável pela leitura de n bytes do ficheiro, através do bloco de bytes já lido. Se o ficheiro terminar antes, é lançada uma GZIPError (Em fillBuffer).
+	def read(self, n):
+		while len(self.inBuffer) - self.inPos < n:
+			self.fillBuffer()
+
+		data = self.inBuffer[self.inPos : self.inPos + n]
+		self.inPos += len(data)
+		return data
+
+	#Método responsável por indicar se ainda há bytes por ler no ficheiro (Ex: outro membro gzip depois do trailer).
+	def hasMoreInput(self):
+		if self.available_bits >= 8 or self.inPos < len(self.inBuffer):
+			return True
+
+		self.fillBuffer(False)
+		return self.inPos < len(self.inBuffer)
+
+	#Método responsável pela leitura e validação do trailer (CRC-32 e ISIZE, 4 bytes cada, em little endian), que se encontra logo após o último bloco.
+	#crc é o CRC-32 dos dados descomprimidos (None se não foi calculado) e size o número de bytes descomprimidos. Se o trailer não for válido é lançada uma GZIPError.
+	def checkTrailer(self, crc, size):
+		trailer = self.readBytes(8)
+		self.CRC32, self.origFileSize = struct.unpack('<II', trailer)
+
+		if crc is not None and crc != self.CRC32:
+			raise GZIPError('CRC-32 does not match')
+
+		if size & 0xffffffff != self.origFileSize:
+			raise GZIPError('ISIZE does not match')
+
 	#Método responsável pela leitura de n bits do bits_buffer Se o valor de keep for True, os bits são deixados no buffer para futuros acessos.
 	def readBits(self, n, keep=False):
 
 		#Loop que lê os bits do ficheiro enquanto que há bits disponíveis (available_bits).
 		while n > self.available_bits:
-			self.bits_buffer = self.f.read(1)[0] << self.available_bits | self.bits_buffer
+			if self.inPos >= len(self.inBuffer):   #O ficheiro é lido em blocos de READ_SIZE bytes.
+				self.fillBuffer()
+			self.bits_buffer = self.inBuffer[self.inPos] << self.available_bits | self.bits_buffer
+			self.inPos += 1
 			self.available_bits += 8   #O valor 8 corresponde ao número de bits num byte.
 		
 		mask = (2**n)-1
@@ -587,13 +1467,44 @@ class GZIP:
 if __name__ == '__main__':
 
 	# gets filename from command line if provided
-	fileName = "FAQ.txt.gz"
-	if len(sys.argv) > 1:
-		fileName = sys.argv[1]			
+	#A opção --range START LENGTH escreve no stdout somente os bytes [START, START + LENGTH) do ficheiro original.
+	parser = argparse.ArgumentParser()
+	parser.add_argument('fileName', nargs='?', default="FAQ.txt.gz", help="ficheiro gzip a descomprimir ('-' para ler do stdin)")
+	parser.add_argument('--range', nargs=2, type=int, metavar=('START', 'LENGTH'))
+	parser.add_argument('--tokens', action='store_true', help='descomprime com o motor de duas fases (tokens + expansão)')
+	parser.add_argument('--codegen', action='store_true', help='descomprime com descodificadores gerados para cada tabela de Huffman')
+	parser.add_argument('--to-bgzf', metavar='OUT', help='converte o ficheiro para BGZF (OUT) e escreve o índice OUT.gzi')
+	parser.add_argument('--untar', metavar='DEST', help='extrai o .tar.gz para a pasta DEST sem escrever o .tar em disco')
+	parser.add_argument('--list', action='store_true', help='lista os membros do .tar.gz sem os extrair')
+	parser.add_argument('--include', metavar='GLOB', action='append', help='considera apenas os membros do tar cujo nome corresponde a GLOB (pode ser repetido)')
+	parser.add_argument('--analyze', action='store_true', help='descomprime bloco a bloco com o método decompress, imprimindo as tabelas de cada bloco (apenas blocos de Huffman dinâmico)')
+	args = parser.parse_args()
+	if args.range and (args.range[0] < 0 or args.range[1] < 0):
+		parser.error('--range: START and LENGTH must not be negative')
 
 	# decompress file
 	#É inicializada a classe GZIP recebendo o nome do ficheiro como parâmetro, tal como indicado no construtor.
-	#É feita a descompressão do ficheiro com recurso ao método decompress da classe GZIP.
-	gz = GZIP(fileName)
-	gz.decompress()
+	#Por omissão, a descompressão é feita com o método inflate (Todos os tipos de bloco e membros) e o resultado é escrito com writeStream. O método decompress só é usado com --analyze.
+	#Os erros nos dados comprimidos são escritos no stderr (Para não se misturarem com os dados no stdout) e o programa termina com código 1.
+	gz = GZIP(args.fileName)
+	try:
+		if args.range:
+			sys.stdout.buffer.write(gz.extract_range(args.range[0], args.range[1], args.codegen))
+		elif args.untar or args.list:
+			gz.extractTar(args.untar or '.', args.include, args.list)
+		elif args.to_bgzf:
+			gz.toBGZF(args.to_bgzf)
+		elif args.tokens:
+			gz.requireHeader()
+			gz.writeStream(gz.inflateTokens())
+			gz.close()
+		elif args.analyze:
+			gz.decompress()
+		else:
+			gz.requireHeader()
+			gz.writeStream(gz.inflate(codegen=args.codegen))
+			gz.close()
+	except (GZIPError, tarfile.TarError) as e:
+		print('Error: %s' % e, file=sys.stderr)
+		sys.exit(1)
 	
\ No newline at end of file